@@ -0,0 +1,340 @@
+"""
+Resume parsing pipeline: file reading, cleaning and extraction.
+
+Kept free of Streamlit so worker processes can import it by name.
+"""
+import re
+import os
+import io
+from zipfile import ZipFile
+import ahocorasick
+
+MAX_PAGES = 10  # resumes are short; don't extract whole accidental uploads
+
+
+
+def read_pdf(source, max_pages=MAX_PAGES):
+    """source: file path, or the file's bytes. Reads at most max_pages pages."""
+    import fitz  # PyMuPDF
+
+    try:
+        if isinstance(source, bytes):
+            pdf = fitz.open(stream=source, filetype="pdf")
+        else:
+            pdf = fitz.open(source)
+        with pdf:
+            n = min(len(pdf), max_pages)
+            text = "\n".join(pdf[i].get_text("text", sort=False) for i in range(n))
+        if not text.strip():
+            # Image-only (scanned) PDFs have no text layer
+            return "PDF error: no extractable text (scanned PDF? run OCR first)"
+        return text
+    except Exception as e:
+        return f"PDF error: {str(e)}"
+
+
+
+
+W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+MC_FALLBACK = "{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback"
+
+
+
+def _in_fallback(node):
+    # mc:Fallback repeats the mc:Choice content (e.g. a VML copy of a text box)
+    return any(True for _ in node.iterancestors(MC_FALLBACK))
+
+
+
+def _docx_paragraph_text(paragraph):
+    parts = []
+    for run in paragraph.iter(f"{W_NS}r"):
+        # Runs of nested paragraphs (text boxes) are read with those paragraphs
+        if next(run.iterancestors(f"{W_NS}p")) is not paragraph or _in_fallback(run):
+            continue
+        for node in run:
+            if node.tag == f"{W_NS}t":
+                parts.append(node.text or "")
+            elif node.tag == f"{W_NS}tab":
+                parts.append("\t")
+            elif node.tag in (f"{W_NS}br", f"{W_NS}cr"):
+                parts.append("\n")
+    return "".join(parts)
+
+
+
+def _as_file(source):
+    return io.BytesIO(source) if isinstance(source, bytes) else source
+
+
+
+def read_docx(source):
+    """source: file path, or the file's bytes"""
+    from lxml import etree
+
+    # Fast path: read paragraph text straight from word/document.xml
+    # (body and table cells, in document order) without python-docx objects
+    try:
+        with ZipFile(_as_file(source)) as z, z.open("word/document.xml") as f:
+            tree = etree.parse(f)
+        paragraphs = (
+            _docx_paragraph_text(p) for p in tree.iter(f"{W_NS}p") if not _in_fallback(p)
+        )
+        return "\n".join(t for t in paragraphs if t.strip())
+    except Exception:
+        pass
+
+    try:
+        import docx
+        doc = docx.Document(_as_file(source))
+        text = "\n".join(para.text for para in doc.paragraphs if para.text.strip())
+        for table in doc.tables:
+            for row in table.rows:
+                text += " " + " ".join(cell.text for cell in row.cells)
+        return text
+    except Exception as e:
+        return f"DOCX error: {str(e)}"
+
+
+
+
+def read_resume(file_path, max_pages=MAX_PAGES):
+    if not os.path.exists(file_path):
+        return "File not found!"
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext == ".pdf":
+        return read_pdf(file_path, max_pages)
+    elif ext == ".docx":
+        return read_docx(file_path)
+    return "Unsupported file type!"
+
+
+
+def read_resume_bytes(data: bytes, name: str, max_pages=MAX_PAGES):
+    """Same as read_resume, for file contents already in memory"""
+    ext = os.path.splitext(name)[1].lower()
+    if ext == ".pdf":
+        return read_pdf(data, max_pages)
+    elif ext == ".docx":
+        return read_docx(data)
+    return "Unsupported file type!"
+
+
+
+
+# ---------- Cleaning ----------
+def clean_text(text: str) -> str:
+    """Aggressive cleaning for skills, email, phone extraction"""
+    if not isinstance(text, str):
+        return ""
+    # str.split() with no args drops every whitespace run in one C loop
+    return " ".join(text.split())
+
+
+
+
+def clean_text_keep_lines(text: str) -> str:
+    """Clean text but preserve line structure for section detection"""
+    if not isinstance(text, str):
+        return ""
+    lines = (" ".join(ln.split()) for ln in text.split("\n"))
+    return "\n".join(ln for ln in lines if ln)
+
+
+
+
+# ---------- Basic info extraction ----------
+# Email and phone alternatives in one pattern, so the text is scanned once
+CONTACT_REGEX = re.compile(
+    r"(?P<email>[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,})"
+    r"|(?P<phone>(?:\+?91[\s\-]*)?[6-9]\d{9})"
+)
+
+
+
+def extract_basic_info(text: str) -> dict:
+    info = {}
+
+    emails = []
+    phones = []
+    for m in CONTACT_REGEX.finditer(text):
+        (emails if m.lastgroup == "email" else phones).append(m.group())
+
+    # Emails
+    info["email"] = emails[0] if emails else "Not found"
+    info["emails"] = list(dict.fromkeys(emails))
+
+    # Phones
+    info["phone"] = phones[0] if phones else "Not found"
+    info["phones"] = list(dict.fromkeys(phones))
+
+    return info
+
+
+
+
+# ---------- Skills extraction ----------
+SKILLS = [
+    # Programming languages
+    "python", "java", "c", "c++", "c#", "javascript", "typescript", "php",
+    "go", "ruby", "kotlin", "swift",
+    # Web
+    "html", "css", "react", "angular", "vue", "node.js", "django", "flask",
+    # Data / ML
+    "sql", "mysql", "postgresql", "mongodb", "pandas", "numpy",
+    "machine learning", "deep learning", "data analysis", "data science",
+    "tensorflow", "pytorch", "scikit-learn",
+    # Tools
+    "excel", "git", "docker", "kubernetes", "linux"
+]
+
+
+
+def build_skill_automaton(skills):
+    automaton = ahocorasick.Automaton()
+    for s in skills:
+        automaton.add_word(s, s)
+    automaton.make_automaton()
+    return automaton
+
+
+
+SKILLS_AUTOMATON = build_skill_automaton(SKILLS)
+
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+
+def extract_skills(text: str):
+    if not isinstance(text, str):
+        return []
+
+    lowered = text.lower()
+    found = set()
+
+    # One pass over the text matches every skill; keep only whole-word hits
+    for end, skill in SKILLS_AUTOMATON.iter(lowered):
+        start = end - len(skill) + 1
+        if start > 0 and _is_word_char(lowered[start - 1]):
+            continue
+        if end + 1 < len(lowered) and _is_word_char(lowered[end + 1]):
+            continue
+        found.add(skill)
+
+    return sorted(found)
+
+
+
+
+# ---------- Education & Experience extraction ----------
+# Matched as whole tokens, so plural/inflected forms are listed explicitly
+EDU_KEYWORDS = [
+    "education", "educational", "academic", "academics", "degree", "degrees",
+    "college", "colleges", "university", "universities", "b.tech", "btech",
+    "b.e", "be", "bachelor", "bachelors", "master", "masters", "m.tech",
+    "mtech", "bsc", "msc", "diploma", "diplomas"
+]
+
+
+
+EXP_KEYWORDS = [
+    "experience", "experiences", "experienced", "employment", "internship",
+    "internships", "intern", "interns", "company", "companies",
+    "organization", "organizations", "worked", "job", "jobs", "role",
+    "roles", "position", "positions"
+]
+
+
+
+EDU_SET = frozenset(EDU_KEYWORDS)
+EXP_SET = frozenset(EXP_KEYWORDS)
+TOKEN_REGEX = re.compile(r"[a-z0-9.+#]+")
+
+
+
+def extract_sections(text: str):
+    """
+    Returns:
+        education_lines: list of lines likely related to education
+        experience_lines: list of lines likely related to experience
+    """
+    if not isinstance(text, str):
+        return [], []
+
+    # Work with line structure (better for resumes)
+    lines = [ln.strip() for ln in text.split("\n") if ln.strip()]
+
+    education_lines = []
+    experience_lines = []
+
+    for line in lines:
+        lower = line.lower()
+        if len(lower) < 3:
+            continue
+
+        # Whole-token lookup, so "be" no longer matches inside "website"
+        tokens = {tok.strip(".") for tok in TOKEN_REGEX.findall(lower)}
+
+        if tokens & EDU_SET:
+            education_lines.append(line)
+        elif tokens & EXP_SET:
+            experience_lines.append(line)
+
+    return list(dict.fromkeys(education_lines)), list(dict.fromkeys(experience_lines))
+
+
+# ---------- MAIN PARSER ----------
+MIN_TEXT_LENGTH = 50  # shorter extracts are treated as empty/scanned documents
+
+
+def parse_resume(file_path: str, max_pages=MAX_PAGES) -> dict:
+    """
+    Complete resume parser: reads file -> extracts all info -> returns structured data
+    """
+    return parse_raw_text(read_resume(file_path, max_pages))
+
+
+def parse_resume_bytes(data: bytes, name: str, max_pages=MAX_PAGES) -> dict:
+    """parse_resume for in-memory uploads; `name` selects the file type"""
+    return parse_raw_text(read_resume_bytes(data, name, max_pages))
+
+
+def parse_raw_text(raw_text: str) -> dict:
+    # Step 1: Bail out on reader errors
+    if raw_text.startswith(("PDF error:", "DOCX error:", "File not found!", "Unsupported")):
+        return {"error": raw_text, "parsed_data": {}}
+    if len(raw_text.strip()) < MIN_TEXT_LENGTH:
+        return {"error": "Empty/scanned document — no text extracted", "parsed_data": {}}
+    
+    # Step 2: Two cleaning strategies
+    cleaned_text = clean_text(raw_text)                         # Aggressive: for skills, email, phone
+    cleaned_for_sections = clean_text_keep_lines(raw_text)      # Line-aware: for education/experience
+    
+    # Step 3: Extract everything
+    basic_info = extract_basic_info(cleaned_text)
+    skills = extract_skills(cleaned_text)
+    education, experience = extract_sections(cleaned_for_sections)
+    
+    # Step 4: Structured output with metadata
+    parsed_data = {
+        "contact": {
+            "email": basic_info["email"],
+            "phone": basic_info["phone"],
+            "all_emails": basic_info["emails"],
+            "all_phones": basic_info["phones"]
+        },
+        "skills": skills,
+        "education": education,
+        "experience": experience,
+        "summary": {
+            "total_skills_found": len(skills),
+            "education_lines": len(education),
+            "experience_lines": len(experience),
+            "raw_text_length": len(raw_text)
+        }
+    }
+    
+    return parsed_data
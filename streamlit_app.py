@@ -1,364 +1,221 @@
 import streamlit as st
-import re
-import fitz  # PyMuPDF
-import docx
 import os
 import json
 from datetime import datetime
-import csv
-import tempfile
-import pandas as pd
-
-def read_pdf(file_path):
-    try:
-        pdf = fitz.open(file_path)
-        text = ""
-        for page in pdf:
-            text += page.get_text("text") + "\n"
-        pdf.close()
-        return text
-    except Exception as e:
-        return f"PDF error: {str(e)}"
-
+import multiprocessing
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from resume_parser import MAX_PAGES, parse_resume_bytes
 
 
-
-def read_docx(file_path):
+def make_parse_executor(max_workers=None):
+    """
+    Process pool for the CPU-bound parsing work. Workers are spawned, not
+    forked from the multi-threaded server, and run resume_parser functions,
+    which pickle by a stable module name. Falls back to threads on hosts
+    where processes are not allowed.
+    """
+    max_workers = max_workers or os.cpu_count()
     try:
-        doc = docx.Document(file_path)
-        text = "\n".join(para.text for para in doc.paragraphs if para.text.strip())
-        for table in doc.tables:
-            for row in table.rows:
-                text += " " + " ".join(cell.text for cell in row.cells)
-        return text
-    except Exception as e:
-        return f"DOCX error: {str(e)}"
-
-
-
-
-def read_resume(file_path):
-    if not os.path.exists(file_path):
-        return "File not found!"
-    ext = os.path.splitext(file_path)[1].lower()
-    if ext == ".pdf":
-        return read_pdf(file_path)
-    elif ext == ".docx":
-        return read_docx(file_path)
-    return "Unsupported file type!"
-
-
-
-
-# ---------- Cleaning ----------
-def clean_text(text: str) -> str:
-    """Aggressive cleaning for skills, email, phone extraction"""
-    if not isinstance(text, str):
-        return ""
-    text = re.sub(r"\s+", " ", text)
-    return text.strip()
-
-
-
-
-def clean_text_keep_lines(text: str) -> str:
-    """Clean text but preserve line structure for section detection"""
-    if not isinstance(text, str):
-        return ""
-    lines = text.split("\n")
-    cleaned_lines = []
-    for ln in lines:
-        ln = re.sub(r"\s+", " ", ln).strip()
-        if ln:
-            cleaned_lines.append(ln)
-    return "\n".join(cleaned_lines)
-
-
-
-
-# ---------- Basic info extraction ----------
-EMAIL_REGEX = re.compile(
-    r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}"
-)
-
-
-
-PHONE_REGEX = re.compile(
-    r"(?:\+?91[\s\-]*)?[6-9]\d{9}"
-)
-
-
-
-def extract_basic_info(text: str) -> dict:
-    info = {}
-
-    # Emails
-    emails = EMAIL_REGEX.findall(text)
-    info["email"] = emails[0] if emails else "Not found"
-    info["emails"] = list(dict.fromkeys(emails))
-
-    # Phones
-    phones = PHONE_REGEX.findall(text)
-    info["phone"] = phones[0] if phones else "Not found"
-    info["phones"] = list(dict.fromkeys(phones))
-
-    return info
-
-
-
-
-# ---------- Skills extraction ----------
-SKILLS = [
-    # Programming languages
-    "python", "java", "c", "c++", "c#", "javascript", "typescript", "php",
-    "go", "ruby", "kotlin", "swift",
-    # Web
-    "html", "css", "react", "angular", "vue", "node.js", "django", "flask",
-    # Data / ML
-    "sql", "mysql", "postgresql", "mongodb", "pandas", "numpy",
-    "machine learning", "deep learning", "data analysis", "data science",
-    "tensorflow", "pytorch", "scikit-learn",
-    # Tools
-    "excel", "git", "docker", "kubernetes", "linux"
-]
-
-
-
-def build_skill_patterns(skills):
-    multi = []
-    single = []
-    for s in skills:
-        if " " in s:  # multi-word skill
-            pattern = re.compile(r"\b" + re.escape(s) + r"\b", re.IGNORECASE)
-            multi.append((s, pattern))
-        else:
-            pattern = re.compile(r"\b" + re.escape(s) + r"\b", re.IGNORECASE)
-            single.append((s, pattern))
-    return multi, single
-
-
-
-MULTIWORD_SKILLS, SINGLEWORD_SKILLS = build_skill_patterns(SKILLS)
-
-
-
-def extract_skills(text: str):
-    if not isinstance(text, str):
-        return []
-
-    found = set()
-
-    # 1) Check multi-word skills first
-    for skill, pattern in MULTIWORD_SKILLS:
-        if pattern.search(text):
-            found.add(skill)
-
-    # 2) Then check single-word skills
-    for skill, pattern in SINGLEWORD_SKILLS:
-        if pattern.search(text):
-            found.add(skill)
-
-    return sorted(found, key=str.lower)
-
-
-
-
-# ---------- Education & Experience extraction ----------
-EDU_KEYWORDS = [
-    "education", "academic", "degree", "degrees", "college",
-    "university", "b.tech", "btech", "b.e", "be", "bachelor",
-    "master", "m.tech", "mtech", "bsc", "msc", "diploma"
-]
-
-
+        executor = ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    except (OSError, NotImplementedError):
+        # e.g. no working sem_open / shared memory in sandboxed runtimes
+        return ThreadPoolExecutor(max_workers=max_workers)
+    
+    # Workers only start on submit, so start one now: hosts that forbid
+    # processes are detected here instead of failing the first batch
+    try:
+        executor.submit(os.getpid).result()
+    except (OSError, BrokenProcessPool):
+        executor.shutdown(wait=False, cancel_futures=True)
+        return ThreadPoolExecutor(max_workers=max_workers)
+    return executor
 
-EXP_KEYWORDS = [
-    "experience", "work experience", "professional experience",
-    "employment", "internship", "intern", "company",
-    "organization", "worked", "job", "role", "position"
-]
 
+@st.cache_resource
+def get_parse_executor():
+    """Long-lived worker pool shared by all sessions"""
+    return make_parse_executor()
 
 
-def extract_sections(text: str):
+@st.cache_data(show_spinner=False, max_entries=256)
+def parse_upload(data: bytes, name: str, max_pages=MAX_PAGES) -> dict:
     """
-    Returns:
-        education_lines: list of lines likely related to education
-        experience_lines: list of lines likely related to experience
+    Parse an uploaded file. Cached on the file bytes, so re-clicking parse or
+    re-uploading the same resume returns the stored result immediately.
     """
-    if not isinstance(text, str):
-        return [], []
-
-    # Work with line structure (better for resumes)
-    lines = [ln.strip() for ln in text.split("\n") if ln.strip()]
-
-    education_lines = []
-    experience_lines = []
-
-    for line in lines:
-        lower = line.lower()
-        if len(lower) < 3:
-            continue
-
-        if any(kw in lower for kw in EDU_KEYWORDS):
-            education_lines.append(line)
-            continue
-
-        if any(kw in lower for kw in EXP_KEYWORDS):
-            experience_lines.append(line)
+    for _ in range(2):
+        executor = get_parse_executor()
+        try:
+            result = executor.submit(parse_resume_bytes, data, name, max_pages).result()
+            break
+        except OSError:
+            # Could not start another worker (e.g. process limit reached);
+            # parse in this thread rather than failing the file
+            result = parse_resume_bytes(data, name, max_pages)
+            break
+        except BrokenProcessPool:
+            # A worker died (e.g. MuPDF crash, OOM kill) and the shared pool is
+            # unusable for every session; drop it so the next call starts fresh
+            if get_parse_executor() is executor:
+                get_parse_executor.clear()
+    else:
+        # Raise rather than return an error dict: exceptions are not cached,
+        # so files that were only collateral damage parse again next time
+        raise BrokenProcessPool(f"Parser worker crashed while parsing {name}")
+    
+    # Add file info
+    result["file_info"] = {
+        "name": name,
+        "size_kb": len(data) / 1024
+    }
+    return result
 
-    def dedup(seq):
-        seen = set()
-        out = []
-        for x in seq:
-            if x not in seen:
-                seen.add(x)
-                out.append(x)
-        return out
 
-    return dedup(education_lines), dedup(experience_lines)
+PROGRESS_EVERY = 5  # files between progress bar updates
 
 
-# ---------- MAIN PARSER ----------
-def parse_resume(file_path: str) -> dict:
+def parse_uploads_parallel(uploaded_files, max_pages=MAX_PAGES):
     """
-    Complete resume parser: reads file -> extracts all info -> returns structured data
+    Parse many uploads concurrently. Threads only wait on the cache and the
+    shared worker pool, which does the CPU-bound work.
+
+    Yields:
+        (index, result) pairs in completion order
     """
-    # Step 1: Read raw text
-    raw_text = read_resume(file_path)
-    if raw_text.startswith(("PDF error:", "DOCX error:", "File not found!", "Unsupported")):
-        return {"error": raw_text, "parsed_data": {}}
-    
-    # Step 2: Two cleaning strategies
-    cleaned_text = clean_text(raw_text)                         # Aggressive: for skills, email, phone
-    cleaned_for_sections = clean_text_keep_lines(raw_text)      # Line-aware: for education/experience
-    
-    # Step 3: Extract everything
-    basic_info = extract_basic_info(cleaned_text)
-    skills = extract_skills(cleaned_text)
-    education, experience = extract_sections(cleaned_for_sections)
-    
-    # Step 4: Structured output with metadata
-    parsed_data = {
-        "contact": {
-            "email": basic_info["email"],
-            "phone": basic_info["phone"],
-            "all_emails": basic_info["emails"],
-            "all_phones": basic_info["phones"]
-        },
-        "skills": skills,
-        "education": education,
-        "experience": experience,
-        "summary": {
-            "total_skills_found": len(skills),
-            "education_lines": len(education),
-            "experience_lines": len(experience),
-            "raw_text_length": len(raw_text)
+    uploads = [(f.getvalue(), f.name) for f in uploaded_files]
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        futures = {
+            executor.submit(parse_upload, data, name, max_pages): i
+            for i, (data, name) in enumerate(uploads)
         }
-    }
-    
-    return parsed_data
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                result = future.result()
+            except BrokenProcessPool as e:
+                # Only this file fails; the result is not cached
+                data, name = uploads[i]
+                result = {
+                    "error": str(e),
+                    "parsed_data": {},
+                    "file_info": {"name": name, "size_kb": len(data) / 1024}
+                }
+            yield i, result
 
 def save_to_csv(results, filename="resume_results.csv"):
     """
     Save resume parsing results to CSV with flattened nested data.
     Handles errors, different structures, and creates timestamped files.
     """
+    import pandas as pd
+    
     if not results:
-        print("⚠️  No results to save!")
+        print("[WARN] No results to save!")
         return None
     
-    print(f"💾 Saving {len(results)} resumes to CSV...")
+    print(f"[INFO] Saving {len(results)} resumes to CSV...")
     
     # Filter successful parses only
     valid_results = [r for r in results if "error" not in r]
     failed_count = len(results) - len(valid_results)
     
     if not valid_results:
-        print("❌ No valid resumes to export!")
+        print("[ERROR] No valid resumes to export!")
         return None
     
-    # Define ALL possible columns (flattened structure)
-    fieldnames = [
-        'file_name', 'file_size_kb', 'email', 'phone', 
-        'total_skills', 'skills_list', 'education_lines', 'experience_lines',
-        'raw_text_length'
-    ]
-    
-    # Prepare flattened rows
-    csv_rows = []
-    for resume in valid_results:
-        file_info = resume.get("file_info", {})
-        contact = resume.get("contact", {})
-        summary = resume.get("summary", {})
-        skills = resume.get("skills", [])
-        
-        row = {
-            'file_name': file_info.get('name', 'Unknown'),
-            'file_size_kb': file_info.get('size_kb', 0),
-            'email': contact.get('email', 'Not found'),
-            'phone': contact.get('phone', 'Not found'),
-            'total_skills': summary.get('total_skills_found', 0),
-            'skills_list': ', '.join(skills[:5]) + ('...' if len(skills) > 5 else ''),
-            'education_lines': summary.get('education_lines', 0),
-            'experience_lines': summary.get('experience_lines', 0),
-            'raw_text_length': summary.get('raw_text_length', 0)
-        }
-        csv_rows.append(row)
+    # Flattened source column -> (CSV column, default when missing)
+    columns = {
+        'file_info_name': ('file_name', 'Unknown'),
+        'file_info_size_kb': ('file_size_kb', 0),
+        'contact_email': ('email', 'Not found'),
+        'contact_phone': ('phone', 'Not found'),
+        'summary_total_skills_found': ('total_skills', 0),
+        'skills_list': ('skills_list', ''),
+        'summary_education_lines': ('education_lines', 0),
+        'summary_experience_lines': ('experience_lines', 0),
+        'summary_raw_text_length': ('raw_text_length', 0)
+    }
+    
+    df = pd.json_normalize(valid_results, sep="_")
+    if "skills" in df:
+        df["skills_list"] = df["skills"].map(
+            lambda s: ', '.join(s[:5]) + ('...' if len(s) > 5 else '') if isinstance(s, list) else ''
+        )
+    df = (
+        df.reindex(columns=list(columns))
+          .fillna({src: default for src, (_, default) in columns.items()})
+          .rename(columns={src: dst for src, (dst, _) in columns.items()})
+          .astype({'total_skills': int, 'education_lines': int,
+                   'experience_lines': int, 'raw_text_length': int})
+    )
     
     # Create timestamped filename
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     safe_filename = filename.replace('.csv', f'_{timestamp}.csv')
     
     try:
-        with open(safe_filename, "w", newline="", encoding="utf-8") as file:
-            writer = csv.DictWriter(file, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(csv_rows)
+        df.to_csv(safe_filename, index=False, encoding="utf-8", lineterminator="\r\n")
         
-        print(f"✅ CSV saved: {safe_filename}")
-        print(f"📊 Exported: {len(csv_rows)} valid / {failed_count} failed resumes")
+        print(f"[OK] CSV saved: {safe_filename}")
+        print(f"[INFO] Exported: {len(df)} valid / {failed_count} failed resumes")
         return safe_filename
         
     except Exception as e:
-        print(f"❌ CSV save failed: {str(e)}")
+        print(f"[ERROR] CSV save failed: {str(e)}")
         return None
 
 
 def save_search_to_csv(search_results, filename="skill_search_results.csv"):
     """Save skill search results to CSV"""
+    import pandas as pd
+    
     if not search_results:
-        print("⚠️  No search results to save!")
+        print("[WARN] No search results to save!")
         return None
     
-    fieldnames = ['file_name', 'file_size_kb', 'matched_skills', 'match_count', 'total_skills']
-    
-    csv_rows = []
-    for result in search_results:
-        row = {
-            'file_name': result.get('name', 'Unknown'),
-            'file_size_kb': result.get('size_kb', 0),
-            'matched_skills': ', '.join([m['skill'] for m in result.get('matched_skills', [])]),
-            'match_count': result.get('match_count', 0),
-            'total_skills': result.get('total_skills', 0)
-        }
-        csv_rows.append(row)
+    df = pd.DataFrame(search_results).reindex(
+        columns=['name', 'size_kb', 'matched_skills', 'match_count', 'total_skills']
+    )
+    df['matched_skills'] = df['matched_skills'].map(
+        lambda ms: ', '.join(m['skill'] for m in ms) if isinstance(ms, list) else ''
+    )
+    df = (
+        df.fillna({'name': 'Unknown', 'size_kb': 0, 'match_count': 0, 'total_skills': 0})
+          .rename(columns={'name': 'file_name', 'size_kb': 'file_size_kb'})
+          .astype({'match_count': int, 'total_skills': int})
+    )
     
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     safe_filename = filename.replace('.csv', f'_{timestamp}.csv')
     
-    with open(safe_filename, "w", newline="", encoding="utf-8") as file:
-        writer = csv.DictWriter(file, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(csv_rows)
+    df.to_csv(safe_filename, index=False, encoding="utf-8", lineterminator="\r\n")
     
-    print(f"✅ Search CSV saved: {safe_filename}")
+    print(f"[OK] Search CSV saved: {safe_filename}")
     return safe_filename
 
 
 
 # ========== NEW SKILL SEARCH FUNCTIONS ==========
-def search_by_skill(resumes, skill, case_sensitive=False, partial_match=True):
+def build_skill_index(resumes):
+    """
+    Inverted index of skill -> indices of the resumes that list it.
+    Built once after parsing so searches only touch the distinct skills.
+    """
+    index = defaultdict(list)
+    for i, resume in enumerate(resumes):
+        if "error" in resume:  # Skip failed parses
+            continue
+        for s in resume.get("skills", []):
+            index[s].append(i)
+    return dict(index)
+
+
+def search_by_skill(resumes, skill, case_sensitive=False, partial_match=True, index=None):
     """
     Advanced resume search by skill with multiple matching strategies.
     
@@ -367,6 +224,7 @@ def search_by_skill(resumes, skill, case_sensitive=False, partial_match=True):
         skill: Skill to search for (str)
         case_sensitive: If True, respect case (default: False)
         partial_match: If True, match partial skills (default: True)
+        index: Prebuilt build_skill_index(resumes); built on the fly if omitted
     
     Returns:
         List of matching resumes with match details
@@ -375,40 +233,39 @@ def search_by_skill(resumes, skill, case_sensitive=False, partial_match=True):
         return []
     
     skill = skill if case_sensitive else skill.lower().strip()
-    matched = []
+    if index is None:
+        index = build_skill_index(resumes)
     
-    for resume in resumes:
-        if "error" in resume:  # Skip failed parses
-            continue
-            
-        resume_skills = resume.get("skills", [])
-        matches = []
-        
-        for resume_skill in resume_skills:
-            resume_skill_clean = resume_skill if case_sensitive else resume_skill.lower()
-            
-            if partial_match:
-                # Flexible partial matching (e.g., "py" matches "python")
-                if skill in resume_skill_clean or resume_skill_clean in skill:
-                    matches.append({
-                        "skill": resume_skill,
-                        "match_type": "partial" if len(skill) < len(resume_skill_clean) else "exact"
-                    })
-            else:
-                # Exact word boundary matching only
-                if skill == resume_skill_clean:
-                    matches.append({
-                        "skill": resume_skill,
-                        "match_type": "exact"
-                    })
+    # Resolve the query against distinct skills, not every resume
+    matched_skills = {}
+    for resume_skill in index:
+        resume_skill_clean = resume_skill if case_sensitive else resume_skill.lower()
         
-        if matches:
-            matched.append({
-                **resume["file_info"],  # File metadata
-                "matched_skills": matches,
-                "total_skills": len(resume_skills),
-                "match_count": len(matches)
-            })
+        if partial_match:
+            # Flexible partial matching (e.g., "py" matches "python")
+            if skill in resume_skill_clean or resume_skill_clean in skill:
+                matched_skills[resume_skill] = "partial" if len(skill) < len(resume_skill_clean) else "exact"
+        else:
+            # Exact word boundary matching only
+            if skill == resume_skill_clean:
+                matched_skills[resume_skill] = "exact"
+    
+    hits = sorted({i for s in matched_skills for i in index[s]})
+    
+    matched = []
+    for i in hits:
+        resume = resumes[i]
+        resume_skills = resume.get("skills", [])
+        matches = [
+            {"skill": s, "match_type": matched_skills[s]}
+            for s in resume_skills if s in matched_skills
+        ]
+        matched.append({
+            **resume["file_info"],  # File metadata
+            "matched_skills": matches,
+            "total_skills": len(resume_skills),
+            "match_count": len(matches)
+        })
     
     # Sort by most matches first
     matched.sort(key=lambda x: x["match_count"], reverse=True)
@@ -425,6 +282,7 @@ def main():
     st.sidebar.markdown("---")
     st.sidebar.header("⚙️ Options")
     max_files = st.sidebar.slider("Max files to process", 1, 50, 10)
+    max_pages = st.sidebar.slider("Max PDF pages per file", 1, 50, MAX_PAGES)
     export_csv = st.sidebar.checkbox("Export to CSV", value=True)
     
     # Main tabs
@@ -444,32 +302,20 @@ def main():
             st.success(f"✅ {len(uploaded_files)} files uploaded!")
             
             if st.button("🚀 Parse All Resumes", type="primary"):
-                with st.spinner("Parsing resumes..."):
-                    results = []
-                    
-                    # Process each file
-                    for i, uploaded_file in enumerate(uploaded_files[:max_files]):
-                        # Save uploaded file to temp
-                        with tempfile.NamedTemporaryFile(delete=False, suffix=f"_{uploaded_file.name}") as tmp:
-                            tmp.write(uploaded_file.getvalue())
-                            tmp_path = tmp.name
-                        
-                        st.info(f"📄 Processing {i+1}/{len(uploaded_files)}: {uploaded_file.name}")
-                        
-                        # Parse with your function
-                        result = parse_resume(tmp_path)
-                        
-                        # Add file info
-                        result["file_info"] = {
-                            "name": uploaded_file.name,
-                            "size_kb": len(uploaded_file.getvalue()) / 1024
-                        }
-                        
-                        results.append(result)
-                        os.unlink(tmp_path)  # Clean up temp file
-                    
-                    st.session_state.results = results
-                    st.success("🎉 Parsing complete!")
+                files = uploaded_files[:max_files]
+                
+                results = [None] * len(files)
+                progress = st.progress(0.0, text="Parsing resumes...")
+                
+                for done, (i, result) in enumerate(parse_uploads_parallel(files, max_pages), start=1):
+                    results[i] = result
+                    # Each UI update is a round trip to the browser, so batch them
+                    if done % PROGRESS_EVERY == 0 or done == len(files):
+                        progress.progress(done / len(files), text=f"📄 Parsed {done}/{len(files)}")
+                
+                st.session_state.results = results
+                st.session_state.skill_index = build_skill_index(results)
+                st.success("🎉 Parsing complete!")
                 
                 # Display results
                 if 'results' in st.session_state:
@@ -481,7 +327,10 @@ def main():
             skill = st.text_input("Enter skill to search (e.g., 'python', 'react')")
             if skill:
                 if st.button("Search", type="secondary"):
-                    matches = search_by_skill(st.session_state.results, skill)
+                    matches = search_by_skill(
+                        st.session_state.results, skill,
+                        index=st.session_state.get("skill_index")
+                    )
                     display_search_results(matches, skill)
         else:
             st.warning("👈 Parse some resumes first!")
@@ -529,29 +378,32 @@ def display_search_results(matches, skill):
                 st.success(f"✅ {m['skill']} ({m['match_type'].upper()})")
 
 def display_analytics(results, export_csv):
+    import pandas as pd
+    
     valid_results = [r for r in results if "error" not in r]
     
     if valid_results:
-        df = pd.DataFrame([{
-            'File': r['file_info']['name'],
-            'Email': r['contact']['email'],
-            'Skills': len(r['skills']),
-            'Education': len(r['education']),
-            'Experience': len(r['experience'])
-        } for r in valid_results])
+        # One list per column; no intermediate per-row dicts
+        df = pd.DataFrame({
+            'File': [r['file_info']['name'] for r in valid_results],
+            'Email': [r['contact']['email'] for r in valid_results],
+            'Skills': [len(r['skills']) for r in valid_results],
+            'Education': [len(r['education']) for r in valid_results],
+            'Experience': [len(r['experience']) for r in valid_results]
+        })
         
         st.dataframe(df, use_container_width=True)
         
         col1, col2, col3 = st.columns(3)
         with col1:
-            st.metric("Total Skills", sum(len(r['skills']) for r in valid_results))
+            st.metric("Total Skills", int(df['Skills'].sum()))
         with col2:
             st.metric("Avg Skills", df['Skills'].mean())
         with col3:
             st.metric("Success Rate", f"{len(valid_results)}/{len(results)}")
         
         if export_csv:
-            csv = df.to_csv(index=False).encode('utf-8')
+            csv = df.to_csv(index=False, lineterminator="\n")
             st.download_button("📊 Download CSV", csv, "analytics.csv", "text/csv")
 
 if __name__ == "__main__":